@@ -39,6 +39,14 @@ Ejemplos:
     convert_parser.add_argument('--output-ext', default='.png', help='Extensión de archivo de salida (predeterminado: .png)')
     convert_parser.add_argument('--remove-bg', action='store_true', help='Eliminar fondo')
     convert_parser.add_argument('--bg-color', help='Color de fondo como R,G,B (ejemplo: 255,255,255)')
+    convert_parser.add_argument('--compress-level', type=int, default=1, choices=range(10), metavar='0-9',
+                              help='Nivel de compresión PNG (predeterminado: 1)')
+    convert_parser.add_argument('--prefer-jpeg', action='store_true',
+                              help='Guardar como JPEG las imágenes sin transparencia cuando la salida es PNG')
+    convert_parser.add_argument('--workers', type=int,
+                              help='Número de procesos o hilos en paralelo (predeterminado: número de CPUs)')
+    convert_parser.add_argument('--worker-type', choices=['process', 'thread'], default='process',
+                              help='Usar un pool de procesos o de hilos (predeterminado: process)')
     
     # Comando tile
     tile_parser = subparsers.add_parser('tile', help='Dividir imagen en mosaicos')
@@ -48,6 +56,10 @@ Ejemplos:
                            help='Tamaño del mosaico como ANCHO,ALTO (predeterminado: 145,145)')
     tile_parser.add_argument('--output-ext', default='.png', 
                            help='Extensión de archivo de salida (predeterminado: .png)')
+    tile_parser.add_argument('--compress-level', type=int, default=1, choices=range(10), metavar='0-9',
+                           help='Nivel de compresión PNG (predeterminado: 1)')
+    tile_parser.add_argument('--prefer-jpeg', action='store_true',
+                           help='Guardar los mosaicos como JPEG si la imagen no tiene transparencia')
     
     return parser
 
@@ -97,7 +109,11 @@ def main(args: Optional[List[str]] = None) -> int:
                     input_ext=Path(parsed_args.entrada).suffix,
                     output_ext=parsed_args.output_ext,
                     remove_bg=parsed_args.remove_bg,
-                    bg_color=bg_color
+                    bg_color=bg_color,
+                    compress_level=parsed_args.compress_level,
+                    prefer_jpeg=parsed_args.prefer_jpeg,
+                    workers=parsed_args.workers,
+                    worker_type=parsed_args.worker_type
                 )
             else:
                 # Conversión por lotes
@@ -107,7 +123,11 @@ def main(args: Optional[List[str]] = None) -> int:
                     input_ext=parsed_args.input_ext,
                     output_ext=parsed_args.output_ext,
                     remove_bg=parsed_args.remove_bg,
-                    bg_color=bg_color
+                    bg_color=bg_color,
+                    compress_level=parsed_args.compress_level,
+                    prefer_jpeg=parsed_args.prefer_jpeg,
+                    workers=parsed_args.workers,
+                    worker_type=parsed_args.worker_type
                 )
                 
         elif parsed_args.comando == 'tile':
@@ -116,7 +136,9 @@ def main(args: Optional[List[str]] = None) -> int:
                 input_path=parsed_args.entrada,
                 output_dir=parsed_args.salida,
                 tile_size=tile_size,
-                output_ext=parsed_args.output_ext
+                output_ext=parsed_args.output_ext,
+                compress_level=parsed_args.compress_level,
+                prefer_jpeg=parsed_args.prefer_jpeg
             ):
                 pass  # Solo iterar a través del generador
                 
@@ -5,14 +5,26 @@ Este módulo proporciona las funciones principales para el procesamiento de imá
 incluyendo conversión de formatos, eliminación de fondos y operaciones de división de imágenes.
 """
 
+import io
 import os
+import struct
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import partial
 from pathlib import Path
 from typing import Tuple, Optional, Union, Generator
+import numpy as np
 from PIL import Image, ImageFile
 
 # Enable loading of truncated images
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
+# Load all format plugins up front instead of lazily inside the first open/save
+Image.init()
+
+# Packed RGBA constants for _remove_background; built from bytes so they are endian-independent
+_RGB_MASK_U32 = np.array([255, 255, 255, 0], dtype=np.uint8).view(np.uint32)[0]
+_TRANSPARENT_U32 = np.array([255, 255, 255, 0], dtype=np.uint8).view(np.uint32)[0]
+
 class ImageProcessorError(Exception):
     """Excepción base para errores de procesamiento de imágenes."""
     pass
@@ -36,12 +48,104 @@ def ensure_directory_exists(directory: Union[str, Path]) -> Path:
     except Exception as e:
         raise ImageProcessorError(f"Failed to create directory {directory}: {str(e)}")
 
+def _has_alpha(img: Image.Image) -> bool:
+    """Indica si la imagen tiene un canal alfa o un color transparente."""
+    return img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info
+
+def _to_8bit(img: Image.Image) -> Image.Image:
+    """Reduce las imágenes de 16 bits, enteras o de coma flotante a escala de grises de 8 bits.
+    
+    Los modos 'I;16' e 'I' se tratan como datos de 16 bits: 'I' se recorta a 0-65535 y
+    ambos conservan el byte alto, sin mirar los valores de la imagen, de modo que el mismo
+    valor da siempre el mismo resultado. Solo el modo 'F', sin rango fijo, se normaliza
+    con el máximo de cada imagen.
+    """
+    if img.mode.startswith('I;16'):
+        # Keep the high byte: exact rescale from 0-65535 to 0-255
+        return Image.fromarray((np.asarray(img) >> 8).astype(np.uint8))
+    if img.mode == 'I':
+        # Same rule as I;16 (older Pillow opens 16-bit PNGs as 'I')
+        arr = np.clip(np.asarray(img), 0, 65535) >> 8
+        return Image.fromarray(arr.astype(np.uint8))
+    if img.mode == 'F':
+        arr = np.asarray(img, dtype=np.float32)
+        peak = arr.max() if arr.size else 0
+        if peak > 0:
+            arr = arr * (255.0 / peak)
+        return Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8))
+    return img
+
+def _format_for_ext(output_ext: str) -> str:
+    """Obtiene el formato de Pillow para una extensión (ej. '.jpg' -> 'JPEG')."""
+    return Image.registered_extensions().get(output_ext.lower(), output_ext[1:].upper())
+
+def _save_options(output_format: str, compress_level: int) -> dict:
+    """Devuelve los parámetros de guardado rápidos para el formato indicado."""
+    output_format = output_format.upper()
+    if output_format == 'PNG':
+        return {'compress_level': compress_level, 'optimize': False}
+    if output_format == 'JPEG':
+        return {'quality': 85, 'optimize': False, 'progressive': False}
+    return {}
+
+def _remove_background(arr: np.ndarray, bg_color: Tuple[int, int, int]) -> None:
+    """Vuelve transparentes, en el propio array RGBA, los píxeles del color de fondo."""
+    # View each RGBA pixel as one uint32 so the match is a single masked compare.
+    # This is already as fast for black or white as any per-channel special case.
+    pixels = arr.view(np.uint32)[..., 0]
+    bg_value = np.array([*bg_color, 0], dtype=np.uint8).view(np.uint32)[0]
+    
+    pixels[(pixels & _RGB_MASK_U32) == bg_value] = _TRANSPARENT_U32
+
+def _load_bmp_fast(input_path: Union[str, Path]) -> Optional[np.ndarray]:
+    """Lee un BMP sin comprimir de 24 o 32 bits directamente a un array RGBA.
+    
+    El archivo se mapea en memoria y los píxeles BGR se copian una sola vez al
+    array de salida, sin pasar por el decodificador de Pillow.
+    
+    Args:
+        input_path: Ruta al archivo BMP
+        
+    Returns:
+        np.ndarray: Array RGBA (alto, ancho, 4), o None si el BMP usa una variante
+        no soportada (compresión, paleta, cabecera antigua o archivo truncado)
+    """
+    mm = np.memmap(input_path, dtype=np.uint8, mode='r')
+    if mm.size < 54:
+        return None
+    
+    header = mm[:54].tobytes()
+    signature, offset = struct.unpack_from('<2s8xI', header, 0)
+    dib_size, width, height, _, bpp, compression = struct.unpack_from('<IiiHHI', header, 14)
+    if signature != b'BM' or dib_size < 40 or bpp not in (24, 32) or compression != 0 or width <= 0:
+        return None
+    
+    rows = abs(height)
+    stride = ((width * bpp + 31) // 32) * 4
+    if offset + stride * rows > mm.size:
+        return None
+    
+    pixels = mm[offset:offset + stride * rows].reshape(rows, stride)
+    pixels = pixels[:, :width * (bpp // 8)].reshape(rows, width, bpp // 8)
+    if height > 0:
+        # Positive height means rows are stored bottom-up
+        pixels = pixels[::-1]
+    
+    # BGR(X) -> RGBA; the fourth byte of 32-bit BI_RGB is unused, as in Pillow
+    rgba = np.empty((rows, width, 4), dtype=np.uint8)
+    rgba[..., :3] = pixels[..., 2::-1]
+    rgba[..., 3] = 255
+    return rgba
+
 def convert_image(
     input_path: Union[str, Path],
     output_path: Union[str, Path],
     output_format: str = 'PNG',
     remove_bg: bool = False,
-    bg_color: Optional[Tuple[int, int, int]] = None
+    bg_color: Optional[Tuple[int, int, int]] = None,
+    compress_level: int = 1,
+    prefer_jpeg: bool = False,
+    ensure_parent: bool = True
 ) -> None:
     """Convierte una imagen a otro formato con opción de eliminar el fondo.
     
@@ -51,47 +155,89 @@ def convert_image(
         output_format: Formato de salida (ej. 'PNG', 'BMP')
         remove_bg: Si se debe eliminar el fondo
         bg_color: Color del fondo a eliminar (tupla RGB). Si es None, usa (0,0,0) si remove_bg es True
+        compress_level: Nivel de compresión zlib para PNG (0-9)
+        prefer_jpeg: Si la salida es PNG y la imagen no usa transparencia, guardar
+            como JPEG (extensión .jpg) en su lugar
+        ensure_parent: Si se debe crear el directorio de salida cuando no existe
         
     Raises:
         ImageProcessorError: Si falla la conversión
     """
+    output_format = output_format.upper()
     try:
         with Image.open(input_path) as img:
-            # Convert to RGBA to support transparency
-            img = img.convert('RGBA')
+            img = _to_8bit(img)
+            
+            if (prefer_jpeg and not remove_bg and output_format == 'PNG'
+                    and not _has_alpha(img)):
+                # Opaque image: JPEG encodes far faster than PNG
+                output_format = 'JPEG'
+                output_path = os.path.splitext(output_path)[0] + '.jpg'
             
             if remove_bg:
                 bg_color = bg_color or (0, 0, 0)
-                datas = img.getdata()
-                new_data = []
-                
-                for item in datas:
-                    # Change the specified background color to transparent
-                    if item[:3] == bg_color:
-                        new_data.append((255, 255, 255, 0))
-                    else:
-                        new_data.append(item)
-                
-                img.putdata(new_data)
+                arr = _load_bmp_fast(input_path) if img.format == 'BMP' else None
+                if arr is None:
+                    arr = np.array(img.convert('RGBA'), dtype=np.uint8)
+                _remove_background(arr, bg_color)
+                img = Image.fromarray(arr)
+            elif output_format == 'JPEG':
+                # JPEG has no alpha channel
+                if img.mode not in ('L', 'RGB'):
+                    img = img.convert('RGB')
+            elif img.mode not in ('1', 'L', 'P', 'RGB', 'RGBA'):
+                # Common modes are saved as-is; anything else goes through RGBA as before
+                img = img.convert('RGBA')
             
-            # Ensure output directory exists
-            output_path = Path(output_path)
-            output_path.parent.mkdir(parents=True, exist_ok=True)
+            if ensure_parent:
+                # Ensure output directory exists
+                Path(output_path).parent.mkdir(parents=True, exist_ok=True)
             
-            img.save(output_path, output_format)
+            img.save(output_path, format=output_format, **_save_options(output_format, compress_level))
     except Exception as e:
         raise ImageProcessorError(f"Failed to convert {input_path}: {str(e)}")
 
+def _prefetch_file(path: str) -> None:
+    """Pide al sistema operativo que empiece a leer el archivo en segundo plano."""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        # Prefetching is only a hint; the real read reports any error
+        pass
+
+def _convert_prefetching(
+    input_path: str,
+    output_path: str,
+    next_path: Optional[str],
+    **kwargs
+) -> None:
+    """Convierte un archivo del lote mientras se lee por adelantado el siguiente."""
+    if next_path is not None:
+        _prefetch_file(next_path)
+    convert_image(input_path, output_path, **kwargs)
+
 def batch_convert(
     input_dir: Union[str, Path],
     output_dir: Union[str, Path],
     input_ext: str = '.bmp',
     output_ext: str = '.png',
     remove_bg: bool = False,
-    bg_color: Optional[Tuple[int, int, int]] = None
+    bg_color: Optional[Tuple[int, int, int]] = None,
+    workers: Optional[int] = None,
+    compress_level: int = 1,
+    prefer_jpeg: bool = False,
+    worker_type: str = 'process'
 ) -> None:
     """Convierte múltiples imágenes en un directorio.
     
+    Las imágenes se convierten en paralelo usando un pool de procesos o de hilos.
+    
     Args:
         input_dir: Directorio que contiene las imágenes de entrada
         output_dir: Directorio donde se guardarán las imágenes convertidas
@@ -99,26 +245,95 @@ def batch_convert(
         output_ext: Extensión de archivo de salida
         remove_bg: Si se debe eliminar el fondo
         bg_color: Color del fondo a eliminar (tupla RGB)
+        workers: Número de procesos o hilos a usar. Si es None, usa os.cpu_count()
+        compress_level: Nivel de compresión zlib para PNG (0-9)
+        prefer_jpeg: Guardar como JPEG las imágenes opacas cuando la salida es PNG
+        worker_type: 'process' para un pool de procesos o 'thread' para un pool de hilos
+        
+    Raises:
+        ValueError: Si worker_type no es válido
     """
-    input_dir = Path(input_dir)
+    if worker_type == 'process':
+        executor_class = ProcessPoolExecutor
+    elif worker_type == 'thread':
+        # Pillow and NumPy release the GIL in their C loops, so threads scale without IPC
+        executor_class = ThreadPoolExecutor
+    else:
+        raise ValueError(f"Tipo de worker inválido: {worker_type}. Se espera 'process' o 'thread'")
+    
     output_dir = ensure_directory_exists(output_dir)
     
-    for img_file in input_dir.glob(f'*{input_ext}'):
-        if img_file.is_file():
-            output_path = output_dir / f"{img_file.stem}{output_ext}"
-            convert_image(
-                img_file, 
-                output_path,
-                output_ext[1:].upper(),
-                remove_bg,
-                bg_color
-            )
+    # Output paths are built as plain strings; Path arithmetic per file is measurable on large batches
+    out_prefix = os.path.join(output_dir, '')
+    files = []
+    output_paths = []
+    
+    # DirEntry.is_file() uses the d_type from the directory listing, avoiding a stat() per entry
+    with os.scandir(input_dir) as it:
+        for entry in it:
+            name = entry.name
+            if name.endswith(input_ext) and entry.is_file():
+                stem = os.path.splitext(name)[0]
+                files.append(entry.path)
+                output_paths.append(f"{out_prefix}{stem}{output_ext}")
+    if not files:
+        return
+    
+    workers = workers or os.cpu_count() or 1
+    # Batch files per task to amortize IPC, without starving workers on small batches
+    chunksize = max(1, min(8, len(files) // workers))
+    
+    # Each task hints the kernel to read ahead the file the same worker will open
+    # next, so its disk I/O overlaps with decoding and encoding the current one
+    if executor_class is ThreadPoolExecutor:
+        # Threads take tasks one at a time (map ignores chunksize), so a thread
+        # that finishes file i usually picks up file i + workers
+        next_paths = files[workers:] + [None] * min(workers, len(files))
+    else:
+        # A process works through its chunk in order; the last file of a chunk
+        # has no known successor
+        next_paths = [
+            files[i + 1] if (i + 1) % chunksize and i + 1 < len(files) else None
+            for i in range(len(files))
+        ]
+    
+    # output_dir already exists, so workers skip the per-file mkdir
+    worker = partial(
+        _convert_prefetching,
+        output_format=_format_for_ext(output_ext),
+        remove_bg=remove_bg,
+        bg_color=bg_color,
+        compress_level=compress_level,
+        prefer_jpeg=prefer_jpeg,
+        ensure_parent=False
+    )
+    
+    with executor_class(max_workers=workers) as executor:
+        # Consume the iterator so worker exceptions are re-raised here
+        list(executor.map(worker, files, output_paths, next_paths, chunksize=chunksize))
+
+def _save_tile(
+    img: Image.Image,
+    box: Tuple[int, int, int, int],
+    output_path: Path,
+    output_format: str,
+    save_options: dict
+) -> Path:
+    """Codifica y guarda un mosaico desde el pool de hilos de tile_image."""
+    # Encode in memory so each tile costs a single write() instead of one per chunk
+    buf = io.BytesIO()
+    img.crop(box).save(buf, format=output_format, **save_options)
+    with open(output_path, 'wb') as f:
+        f.write(buf.getbuffer())
+    return output_path
 
 def tile_image(
     input_path: Union[str, Path],
     output_dir: Union[str, Path],
     tile_size: Tuple[int, int] = (145, 145),
-    output_ext: str = '.png'
+    output_ext: str = '.png',
+    compress_level: int = 1,
+    prefer_jpeg: bool = False
 ) -> Generator[Path, None, None]:
     """Divide una imagen en mosaicos más pequeños.
     
@@ -127,6 +342,9 @@ def tile_image(
         output_dir: Directorio donde se guardarán los mosaicos
         tile_size: Tamaño de cada mosaico (ancho, alto)
         output_ext: Extensión de archivo de salida
+        compress_level: Nivel de compresión zlib para PNG (0-9)
+        prefer_jpeg: Si la salida es PNG y la imagen no usa transparencia, guardar
+            los mosaicos como JPEG (extensión .jpg) en su lugar
         
     Yields:
         Path: Ruta a cada mosaico creado
@@ -143,21 +361,38 @@ def tile_image(
             # Ensure output directory exists
             output_dir = ensure_directory_exists(output_dir)
             base_name = Path(input_path).stem
+            output_format = _format_for_ext(output_ext)
+            
+            if prefer_jpeg and output_format == 'PNG' and not _has_alpha(img):
+                # Opaque image: JPEG encodes far faster than PNG
+                output_format, output_ext = 'JPEG', '.jpg'
+            save_options = _save_options(output_format, compress_level)
             
-            for i in range(x_tiles):
+            if output_format == 'JPEG' and img.mode not in ('L', 'RGB'):
+                # JPEG has no alpha channel
+                img = img.convert('RGB')
+            
+            # Decode once up front so every crop is a plain memory copy and the
+            # worker threads never race on Pillow's lazy load
+            img.load()
+            
+            # Pillow releases the GIL while encoding, so threads scale here
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                futures = []
+                # Walk tiles in raster order (rows outer) to follow the row-major buffer
                 for j in range(y_tiles):
-                    left = i * tile_width
-                    upper = j * tile_height
-                    right = left + tile_width
-                    lower = upper + tile_height
-                    
-                    # Crop the tile
-                    tile = img.crop((left, upper, right, lower))
-                    
-                    # Save the tile
-                    output_path = output_dir / f"{base_name}_{i}_{j}{output_ext}"
-                    tile.save(output_path, output_ext[1:].upper())
-                    yield output_path
+                    for i in range(x_tiles):
+                        left = i * tile_width
+                        upper = j * tile_height
+                        box = (left, upper, left + tile_width, upper + tile_height)
+                        
+                        output_path = output_dir / f"{base_name}_{i}_{j}{output_ext}"
+                        futures.append(executor.submit(
+                            _save_tile, img, box, output_path, output_format, save_options
+                        ))
+                
+                for future in as_completed(futures):
+                    yield future.result()
                     
     except Exception as e:
         raise ImageProcessorError(f"Failed to tile image {input_path}: {str(e)}")
@@ -15,6 +15,7 @@ setup(
     packages=find_packages(),
     install_requires=[
         'Pillow>=8.0.0',
+        'numpy>=1.17.0',
     ],
     entry_points={
         'console_scripts': [